@@ -0,0 +1,3 @@
+"""
+Scale benchmarks for the notebooks' helper functions, run against the fake Terra backend in `testing.fake_terra`.
+"""
@@ -0,0 +1,112 @@
+"""
+Run the benchmarks and store results as JSON, e.g.
+
+    python -m benchmarks --scales 3 4 5 6 --compare benchmarks/results/1a2b3c4.json
+
+By default results are written to "benchmarks/results/{git commit}.json". The exit status is non-zero if any benchmark
+raises, or, when comparing, regresses.
+"""
+import os
+import sys
+import json
+import platform
+import argparse
+import subprocess
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List
+
+from benchmarks import bench_byod, bench_workflow_cost_estimator  # noqa: F401, register benchmarks
+from benchmarks.harness import REPO_ROOT, FakeBackend, benchmarks, measure
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(names: List[str], scales: List[int], memory: bool, repeat: int,
+        server_args: List[str]) -> List[Dict[str, Any]]:
+    results = list()
+    for name in names:
+        for scale in scales:
+            result = dict(name=name, scale=scale)  # type: Dict[str, Any]
+            try:
+                store, func = benchmarks[name](10 ** scale)
+                with FakeBackend(store, server_args):
+                    result.update(measure(func, memory, repeat))
+            except Exception:
+                result['error'] = traceback.format_exc(limit=-1).strip().splitlines()[-1]
+            print(format_result(result), file=sys.stderr)
+            results.append(result)
+    return results
+
+def format_result(result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"{result['name']:<48} 1e{result['scale']}  error: {result['error']}"
+    throughput = f"{10 ** result['scale'] / result['seconds']:12.0f}/s"
+    peak = f"{result['peak_bytes'] / 2 ** 20:10.1f}MiB" if "peak_bytes" in result else ""
+    return f"{result['name']:<48} 1e{result['scale']}  {result['seconds']:10.3f}s {throughput} {peak}"
+
+def compare(baseline: List[Dict[str, Any]], results: List[Dict[str, Any]], threshold: float) -> bool:
+    """
+    Print the change in time of each benchmark relative to `baseline`, and return True if any benchmark is slower by
+    more than `threshold`, or raises where the baseline has a time.
+    """
+    baseline_seconds = {(r['name'], r['scale']): r['seconds'] for r in baseline if "seconds" in r}
+    regressed = False
+    for result in results:
+        before = baseline_seconds.get((result['name'], result['scale']))
+        if before and "error" in result:
+            print(f"{result['name']:<48} 1e{result['scale']}  {before:10.3f}s -> error: {result['error']}"
+                  f"  REGRESSION")
+            regressed = True
+        elif before and "seconds" in result:
+            ratio = result['seconds'] / before
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressed = True
+            print(f"{result['name']:<48} 1e{result['scale']}  {before:10.3f}s -> {result['seconds']:10.3f}s"
+                  f"  x{ratio:.2f}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[3, 4, 5, 6],
+                        help="Powers of ten of the number of items processed by each benchmark")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory measurement")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of timed calls after a warm-up call. The fastest is reported.")
+    parser.add_argument("--server-args", default="",
+                        help="Arguments for the fake Terra server, e.g. \"--latency 0.05 --bandwidth 1e6\"")
+    parser.add_argument("--output", default=None, help="Results file")
+    parser.add_argument("--compare", default=None, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression when comparing")
+    args = parser.parse_args()
+    commit = git_commit()
+    names = [name for name in sorted(benchmarks) if args.filter in name]
+    results = run(names, args.scales, not args.no_memory, args.repeat, args.server_args.split())
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(dict(commit=commit,
+                       date=datetime.utcnow().isoformat(),
+                       python=platform.python_version(),
+                       server_args=args.server_args,
+                       repeat=args.repeat,
+                       results=results), fh, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+    failed = any("error" in result for result in results)
+    if args.compare:
+        with open(args.compare) as fh:
+            failed |= compare(json.load(fh)['results'], results, args.threshold)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmarks for the data table helpers in the byod notebook.
+"""
+import tempfile
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from testing.fake_terra import FakeTerraStore
+from testing.notebook import load_definitions
+from benchmarks import data
+from benchmarks.harness import BUCKET, GOOGLE_PROJECT, WORKSPACE, benchmark, notebook_path
+
+
+SUBDIRECTORY = "my-crams"
+
+@lru_cache()
+def byod() -> Dict[str, Any]:
+    namespace = dict(google_project=GOOGLE_PROJECT,
+                     workspace=WORKSPACE,
+                     bucket=BUCKET,
+                     subdirectory=SUBDIRECTORY,
+                     BLANK_CELL_VALUE="")
+    return load_definitions(notebook_path("byod"), namespace)
+
+_manifests = list()  # type: List[Any]
+
+def manifest_file(n: int) -> str:
+    """
+    Write a manifest of `n` samples to a temporary file, which is removed at interpreter exit.
+    """
+    fh = tempfile.NamedTemporaryFile("w", suffix=".tsv")
+    fh.write(data.cram_crai_manifest(data.sample_ids(n)))
+    fh.flush()
+    _manifests.append(fh)
+    return fh.name
+
+def store_with_tables(number_of_rows: int, number_of_tables: int) -> FakeTerraStore:
+    store = FakeTerraStore()
+    samples = data.sample_ids(number_of_rows)
+    for t in range(number_of_tables):
+        columns = data.phenotype_columns(samples, [f"phenotype_{t}_{c}" for c in range(3)])
+        store.upload_tsv(GOOGLE_PROJECT, WORKSPACE, data.phenotype_tsv(f"table_{t}", columns))
+    return store
+
+@benchmark("byod.upload_rows")
+def upload_rows(n: int):
+    rows = [dict(sample=s, cram=f"{s}.cram", crai=f"{s}.crai") for s in data.sample_ids(n)]
+    return FakeTerraStore(), lambda: byod()['upload_rows']("bench_rows", rows)
+
+@benchmark("byod.upload_columns")
+def upload_columns(n: int):
+    columns = data.phenotype_columns(data.sample_ids(n), ["height", "weight", "age"])
+    return FakeTerraStore(), lambda: byod()['upload_columns']("bench_columns", columns)
+
+@benchmark("byod.create_cram_crai_table")
+def create_cram_crai_table(n: int):
+    listing = data.cram_crai_listing(BUCKET, SUBDIRECTORY, data.sample_ids(n))
+    return FakeTerraStore(), lambda: byod()['create_cram_crai_table']("bench_cram_crai", listing)
+
+@benchmark("byod.get_keyed_rows")
+def get_keyed_rows(n: int):
+    return store_with_tables(n, 1), lambda: byod()['get_keyed_rows']("table_0", "sample")
+
+@benchmark("byod.join_data_tables")
+def join_data_tables(n: int):
+    tables = [f"table_{t}" for t in range(3)]
+    return store_with_tables(n, len(tables)), lambda: byod()['join_data_tables']("bench_joined", tables, "sample")
+
+@benchmark("byod.upload_manifest_table")
+def upload_manifest_table(n: int):
+    manifest = manifest_file(n)
+    sample_ids = set(data.sample_ids(n))
+    location = f"{BUCKET}/{SUBDIRECTORY}"
+    return FakeTerraStore(), lambda: byod()['upload_manifest_table']("bench_manifest", manifest, location,
+                                                                     ["cram", "crai"], sample_ids)
+
+@benchmark("byod.parse_manifest")
+def parse_manifest(n: int):
+    # Discard uploads, measuring manifest parsing, validation, and TSV construction alone
+    namespace = load_definitions(notebook_path("byod"), dict(byod()))
+    namespace['upload_data_table'] = lambda tsv: None
+    manifest = manifest_file(n)
+    sample_ids = set(data.sample_ids(n))
+    location = f"{BUCKET}/{SUBDIRECTORY}"
+    return FakeTerraStore(), lambda: namespace['upload_manifest_table']("bench_manifest", manifest, location,
+                                                                        ["cram", "crai"], sample_ids)
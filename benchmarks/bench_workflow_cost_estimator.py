@@ -0,0 +1,32 @@
+"""
+Benchmarks for the workflow cost estimator notebook.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from testing.fake_terra import FakeTerraStore
+from testing.notebook import cell_code, load_definitions
+from benchmarks import data
+from benchmarks.harness import GOOGLE_PROJECT, WORKSPACE, benchmark, notebook_path
+
+
+@lru_cache()
+def workflow_cost_estimator() -> Dict[str, Any]:
+    return load_definitions(notebook_path("workflow_cost_estimator"), dict())
+
+def store_with_submission(number_of_shards: int) -> Tuple[FakeTerraStore, str]:
+    store = FakeTerraStore()
+    submission, workflow_metadata = data.workflow_shard_metadata(number_of_shards)
+    submission_id = store.add_submission(GOOGLE_PROJECT, WORKSPACE, submission, workflow_metadata)
+    return store, submission_id
+
+@benchmark("workflow_cost_estimator.cost_for_submission")
+def cost_for_submission(n: int):
+    store, submission_id = store_with_submission(n)
+    return store, lambda: list(workflow_cost_estimator()['cost_for_submission'](submission_id))
+
+@benchmark("workflow_cost_estimator.report")
+def report(n: int):
+    store, submission_id = store_with_submission(n)
+    code = cell_code(notebook_path("workflow_cost_estimator"), "report = pd.DataFrame()")
+    return store, lambda: exec(code, dict(workflow_cost_estimator(), submission_id=submission_id))
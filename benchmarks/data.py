@@ -0,0 +1,77 @@
+"""
+Synthetic data generators for benchmarks.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+def sample_ids(number_of_samples: int) -> List[str]:
+    return [f"NWD{i:07d}" for i in range(number_of_samples)]
+
+def cram_crai_listing(bucket: str, pfx: str, samples: List[str]) -> List[str]:
+    """
+    Return a bucket listing with a CRAM and CRAI for each sample. Half of the CRAIs use the "foo.cram.crai" naming
+    convention, and the listing is shuffled.
+    """
+    listing = list()
+    for i, sample in enumerate(samples):
+        listing.append(f"{bucket}/{pfx}/{sample}.cram")
+        listing.append(f"{bucket}/{pfx}/{sample}.cram.crai" if i % 2 else f"{bucket}/{pfx}/{sample}.crai")
+    random.Random(0).shuffle(listing)
+    return listing
+
+def cram_crai_manifest(samples: List[str], sep: str="\t") -> str:
+    """
+    Return a local sample manifest with a CRAM and CRAI file name for each sample.
+    """
+    lines = [sep.join(["sample", "cram", "crai"])]
+    lines.extend(sep.join([sample, f"{sample}.cram", f"{sample}.crai"]) for sample in samples)
+    return "\n".join(lines) + "\n"
+
+def phenotype_columns(samples: List[str], columns: List[str], key_column: str="sample") -> Dict[str, List[str]]:
+    rand = random.Random(0)
+    phenotypes = {c: [f"{rand.random():.6f}" for _ in samples] for c in columns}
+    return {key_column: list(samples), **phenotypes}
+
+def phenotype_tsv(table: str, columns: Dict[str, List[str]]) -> str:
+    headers = sorted(columns.keys())
+    number_of_rows = len(columns[headers[0]])
+    lines = ["\t".join([f"{table}_id", *headers])]
+    lines.extend("\t".join([f"{i}", *[columns[h][i] for h in headers]]) for i in range(number_of_rows))
+    return "\n".join(lines)
+
+def workflow_shard_metadata(number_of_shards: int,
+                            shards_per_workflow: int=1000) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Return a submission and the Cromwell metadata of its workflows, with `number_of_shards` shards of a single task
+    spread across workflows.
+    """
+    rand = random.Random(0)
+    start = datetime(2020, 1, 1)
+    workflows = list()
+    workflow_metadata = dict()
+    for w in range(max(1, -(-number_of_shards // shards_per_workflow))):
+        workflow_id = f"00000000-0000-0000-0000-{w:012d}"
+        number_of_calls = min(shards_per_workflow, number_of_shards - w * shards_per_workflow)
+        calls = list()
+        for shard in range(number_of_calls):
+            shard_start = start + timedelta(seconds=rand.randint(0, 3600))
+            shard_end = shard_start + timedelta(seconds=rand.randint(60, 36000))
+            calls.append({'shardIndex': shard,
+                          'start': shard_start.strftime(DATE_FORMAT),
+                          'end': shard_end.strftime(DATE_FORMAT),
+                          'jes': {'machineType': f"custom-{rand.choice([1, 2, 4, 8])}-{rand.choice([3840, 7680])}"},
+                          'runtimeAttributes': {'cpu': "1",
+                                                'memory': "3.75 GB",
+                                                'preemptible': f"{rand.randint(0, 1)}",
+                                                'disks': "local-disk 10 HDD"}})
+        workflows.append(dict(workflowId=workflow_id, status="Succeeded"))
+        workflow_metadata[workflow_id] = dict(id=workflow_id, status="Succeeded", calls={'bench.task': calls})
+    submission = dict(submissionId="00000000-0000-0000-0000-000000000000",
+                      submissionDate=start.strftime(DATE_FORMAT),
+                      status="Done",
+                      workflows=workflows)
+    return submission, workflow_metadata
@@ -0,0 +1,93 @@
+"""
+Benchmark registration, fake backend management, and measurement.
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from testing.fake_terra import FakeTerraStore, configure_clients
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOOGLE_PROJECT = "bench-billing-project"
+WORKSPACE = "bench-workspace"
+BUCKET = "gs://bench-workspace-bucket"
+
+# Notebook helper code reads the workspace from the environment, sometimes at import time.
+os.environ['GOOGLE_PROJECT'] = GOOGLE_PROJECT
+os.environ['WORKSPACE_NAMESPACE'] = GOOGLE_PROJECT
+os.environ['WORKSPACE_NAME'] = WORKSPACE
+os.environ['WORKSPACE_BUCKET'] = BUCKET
+
+# A benchmark is called with the number of items to process, and returns the store to seed the fake backend with, and
+# the callable to measure.
+Benchmark = Callable[[int], Tuple[FakeTerraStore, Callable[[], Any]]]
+
+benchmarks = dict()  # type: Dict[str, Benchmark]
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(func: Benchmark) -> Benchmark:
+        benchmarks[name] = func
+        return func
+    return register
+
+def notebook_path(name: str) -> str:
+    return os.path.join(REPO_ROOT, "notebooks", name, "main.py")
+
+class FakeBackend:
+    """
+    Serve `store` from a fake Terra server in a subprocess, so that server work is not included in measurements, and
+    point clients at it.
+    """
+    def __init__(self, store: FakeTerraStore, server_args: Optional[List[str]]=None):
+        self.store = store
+        self.server_args = server_args or list()
+        self.proc = None  # type: Optional[subprocess.Popen]
+
+    def __enter__(self) -> "FakeBackend":
+        self._seed = tempfile.NamedTemporaryFile(suffix=".json")
+        self.store.path = self._seed.name
+        self.store.persist = True
+        self.store.save()
+        self.proc = subprocess.Popen([sys.executable, "-m", "testing.fake_terra", "serve", "--port", "0",
+                                      "--load", self._seed.name, *self.server_args],
+                                     cwd=REPO_ROOT, stderr=subprocess.PIPE, universal_newlines=True)
+        line = self.proc.stderr.readline()  # type: ignore
+        if not line.startswith("Serving fake Terra at "):
+            raise RuntimeError(f"Fake Terra server failed to start: {line}")
+        self.url = line.rsplit(" ", 1)[-1].strip()
+        configure_clients(self.url)
+        return self
+
+    def __exit__(self, *args):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait()
+        self._seed.close()
+
+def measure(func: Callable[[], Any], memory: bool=True, repeat: int=3) -> Dict[str, Any]:
+    """
+    Return the fastest wall time of `repeat` calls of `func`, and, if `memory` is True, the peak memory allocated by
+    one more call. An untimed warm-up call comes first, so that one-time costs such as loading notebook definitions
+    and deferred imports are not measured.
+    """
+    assert repeat >= 1
+    func()
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    measurement = dict(seconds=min(timings))  # type: Dict[str, Any]
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            measurement['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return measurement
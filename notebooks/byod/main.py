@@ -1,4 +1,5 @@
 import os
+import tempfile
 import herzog
 
 # Mock the notebook environment
@@ -56,6 +57,9 @@ with herzog.Cell("markdown"):
     respective repository](https://github.com/DataBiosphere/terra-notebook-utils). Firecloud's
     documentation can be found on [its Pypi page](https://pypi.org/project/firecloud/).
 
+    Terra-specific packages take a while to import, so they are imported by the functions that use them the first
+    time those functions are called.
+
     `os.environ['GOOGLE_PROJECT']` refers to your billing project. Your notebook will inherit the
     billing project used by your workspace. `os.environ['WORKSPACE_NAME']` on the other hand returns
     the name of the workspace itself.
@@ -64,12 +68,11 @@ with herzog.Cell("markdown"):
 with herzog.Cell("python"):
     import io
     import os
+    import time
     from uuid import uuid4
     from collections import defaultdict
-    from typing import Any, List, Set, Dict, Iterable
-    # Terra-specific packages
-    from terra_notebook_utils import gs
-    from firecloud import fiss
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from typing import Any, List, Set, Dict, Iterable, Optional
 
     google_project = os.environ['GOOGLE_PROJECT']
     workspace = os.environ['WORKSPACE_NAME']
@@ -83,9 +86,32 @@ with herzog.Cell("markdown"):
     """
 
 with herzog.Cell("python"):
-    def upload_data_table(tsv):
-        resp = fiss.fapi.upload_entities(google_project, workspace, tsv, model="flexible")
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def call_with_retries(fapi_method, *args, retries: int=5, **kwargs):
+        """
+        Call a Firecloud API method, retrying connection errors and transient error responses with exponential backoff.
+        Only idempotent calls should be retried.
+        """
+        import requests
+        assert retries >= 1
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                resp = fapi_method(*args, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt == retries - 1:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    break
         resp.raise_for_status()
+        return resp
+
+    def upload_data_table(tsv: str):
+        from firecloud import fiss
+        call_with_retries(fiss.fapi.upload_entities, google_project, workspace, tsv, model="flexible")
 
     def upload_rows(table: str, rows: List[Dict[str, Any]]):
         assert rows
@@ -150,6 +176,42 @@ with herzog.Cell("python"):
             cram=crams,
             crai=crais))
 
+    def upload_manifest_table(table: str, manifest: str, location: str, path_columns: List[str],
+                              sample_ids: Optional[Set[str]]=None, sample_column: str="sample",
+                              chunksize: int=10000) -> int:
+        """
+        Create a data table from a local CSV or TSV manifest containing a sample column and columns of file names.
+        File names in `path_columns` are replaced with their paths under `location`, e.g. "gs://bucket/my-crams". If
+        `sample_ids` is given, rows with any other sample id are skipped.
+
+        The manifest is memory-mapped and uploaded `chunksize` rows at a time, so memory use does not depend on the
+        size of the manifest. Return the number of rows uploaded.
+        """
+        import pandas as pd
+        sep = "," if manifest.endswith(".csv") else "\t"
+        # An index builds its hash table once, so each chunk is validated without rehashing all sample ids
+        sample_index = pd.Index(list(sample_ids)) if sample_ids is not None else None
+        number_of_rows = 0
+        skipped = 0
+        for chunk in pd.read_csv(manifest, sep=sep, dtype=str, keep_default_na=False, memory_map=True,
+                                 chunksize=chunksize):
+            if sample_index is not None:
+                known = sample_index.get_indexer(chunk[sample_column]) >= 0
+                skipped += len(chunk) - int(known.sum())
+                chunk = chunk[known]
+            if not len(chunk):
+                continue
+            chunk = chunk[sorted(chunk.columns)]
+            for column in path_columns:
+                # Empty file names are left empty, rather than becoming paths to `location` itself
+                chunk[column] = chunk[column].where(chunk[column] == "", f"{location}/" + chunk[column])
+            chunk.insert(0, f"{table}_id", range(number_of_rows, number_of_rows + len(chunk)))
+            upload_data_table(chunk.to_csv(sep="\t", index=False))
+            number_of_rows += len(chunk)
+        if skipped:
+            print(f"Skipped {skipped} manifest rows with unknown sample ids")
+        return number_of_rows
+
 with herzog.Cell("markdown"):
     """
     # Upload to your bucket with gsutil
@@ -226,6 +288,7 @@ with herzog.Cell("markdown"):
     To generate a Terra data table associating crams, crais, and sample ids (e.g. "NWD1") from the data in your bucket,
     use the snippet:
     ```
+    from terra_notebook_utils import gs
     listing = [key for key in gs.list_bucket("my-crams")]
     create_cram_crai_table("my-table-name", listing)
     ```
@@ -257,6 +320,7 @@ with herzog.Cell("markdown"):
     """
 
 with herzog.Cell("python"):
+    from terra_notebook_utils import gs
     listing = [key for key in gs.list_bucket(subdirectory)]
     create_cram_crai_table("my-table-name", listing)
 
@@ -267,6 +331,30 @@ with herzog.Cell("markdown"):
 
     """
 
+with herzog.Cell("markdown"):
+    """
+    ## Generate a data table from a local manifest
+    If you keep a manifest of your samples, upload it to the notebook's disk to create the table directly from it,
+    without listing your bucket. The manifest may be a CSV or TSV file with a header, a `sample` column, and columns of
+    file names, e.g.
+
+    ```
+    sample  cram       crai
+    NWD1    NWD1.cram  NWD1.crai
+    NWD2    NWD2.cram  NWD2.crai
+    ```
+
+    The snippet
+    ```
+    upload_manifest_table("my-table-name", "manifest.tsv", f"{bucket}/{subdirectory}", ["cram", "crai"])
+    ```
+    produces the same table as the listing above. To only include samples you know about, pass their ids, e.g.
+    `sample_ids={"NWD1", "NWD2"}`. Rows with other sample ids are skipped.
+
+    The manifest is read and uploaded in chunks, so manifests with millions of samples can be used without running
+    out of memory.
+    """
+
 with herzog.Cell("markdown"):
     """
     # Merge data tables across sample ids
@@ -303,6 +391,9 @@ with herzog.Cell("markdown"):
     | NWD3      | NWD3.cram  | NWD3.crai | Adrian     | Zap       | Yes        |
 
     Note that the row for `NWD2` is missing from the combined table since it was not present in `diabetic_table`.
+
+    Up to eight tables to join are downloaded at the same time, so joining a few tables takes about as long as
+    downloading the largest one.
     """
 
 with herzog.Cell("markdown"):
@@ -313,8 +404,8 @@ with herzog.Cell("markdown"):
 
 with herzog.Cell("python"):
     def iter_ents(table: str):
-        resp = fiss.fapi.get_entities(google_project, workspace, table)
-        resp.raise_for_status()
+        from firecloud import fiss
+        resp = call_with_retries(fiss.fapi.get_entities, google_project, workspace, table)
         for item in resp.json():
             yield item
 
@@ -330,10 +421,19 @@ with herzog.Cell("python"):
         return dict(columns)
 
     def delete_table(table: str):
-        rows_to_delete = [dict(entityType=e['entityType'], entityName=e['name'])
-                          for e in iter_ents(table)]
-        resp = fiss.fapi.delete_entities(google_project, workspace, rows_to_delete)
-        resp.raise_for_status()
+        from firecloud import fiss
+
+        def delete_remaining_rows():
+            # Deleting rows is not idempotent: if a failed attempt was actually applied, repeating it fails. List the
+            # rows that remain on each attempt instead. Listing is not retried separately, since each attempt lists.
+            resp = fiss.fapi.get_entities(google_project, workspace, table)
+            if resp.status_code != 200:
+                return resp
+            rows_to_delete = [dict(entityType=e['entityType'], entityName=e['name'])
+                              for e in resp.json()]
+            return fiss.fapi.delete_entities(google_project, workspace, rows_to_delete)
+
+        call_with_retries(delete_remaining_rows)
 
     def get_keyed_rows(table_name: str, key_column: str) -> Dict[str, Dict[str, Any]]:
         keyed_rows = dict()
@@ -361,9 +461,13 @@ with herzog.Cell("python"):
                 for k in common_keys}
 
     def join_data_tables(new_table: str, tables_to_join: list, join_column: str):
-        keyed_rows = get_keyed_rows(tables_to_join[0], join_column)
-        for table_name in tables_to_join[1:]:
-            keyed_rows = join_keyed_rows(keyed_rows, get_keyed_rows(table_name, join_column))
+        assert tables_to_join, "No tables to join"
+        # Fetch tables concurrently, at most 8 at a time, and join each table as soon as it arrives
+        with ThreadPoolExecutor(max_workers=min(len(tables_to_join), 8)) as executor:
+            futures = [executor.submit(get_keyed_rows, table_name, join_column) for table_name in tables_to_join]
+            keyed_rows = None
+            for f in as_completed(futures):
+                keyed_rows = f.result() if keyed_rows is None else join_keyed_rows(keyed_rows, f.result())
         upload_rows(new_table, [{join_column: k, **row} for k, row in keyed_rows.items()])
 
 ################################################ TESTS ################################################ noqa
@@ -414,3 +518,19 @@ for i in range(8):
                         alpha=test_metadata_b_keyed_rows.get(sample, dict()).get('alpha', BLANK_CELL_VALUE),
                         beta=test_metadata_b_keyed_rows.get(sample, dict()).get('beta', BLANK_CELL_VALUE))
     assert expected_row == keyed_rows[sample]
+
+with tempfile.NamedTemporaryFile("w", suffix=".tsv") as fh:
+    fh.write("\t".join(["sample", "cram", "crai", "note"]) + "\n")
+    for i in range(25):
+        crai = f"sample_id_{i}.crai" if i % 4 else ""
+        fh.write("\t".join([f"sample_id_{i}", f"sample_id_{i}.cram", crai, ""]) + "\n")
+    fh.flush()
+    delete_table("test_manifest_table")
+    number_of_rows = upload_manifest_table("test_manifest_table", fh.name, f"{bucket}/{subdirectory}", ["cram", "crai"],
+                                           sample_ids={f"sample_id_{i}" for i in range(0, 25, 2)}, chunksize=4)
+manifest_keyed_rows = get_keyed_rows("test_manifest_table", "sample")
+assert 13 == number_of_rows == len(manifest_keyed_rows)
+for i in range(0, 25, 2):
+    assert manifest_keyed_rows[f'sample_id_{i}'] == dict(cram=f"{bucket}/{subdirectory}/sample_id_{i}.cram",
+                                                         crai=f"{bucket}/{subdirectory}/sample_id_{i}.crai" if i % 4 else "",
+                                                         note="")
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import herzog
 from unittest import mock
 
@@ -55,9 +56,13 @@ with herzog.Cell("markdown"):
 
 with herzog.Cell("python"):
     import os
-    from firecloud import fiss
+    import time
+    from typing import List, Set, Optional
     import terra_notebook_utils as tnu
 
+    google_project = os.environ['GOOGLE_PROJECT']
+    workspace = os.environ['WORKSPACE_NAME']
+
     def get_drs_urls(table_name):
         """
         Return a dictionary containing drs urls and file names, using sample as the key.
@@ -71,11 +76,68 @@ with herzog.Cell("python"):
             info[sample] = dict(file_name=file_name, drs_url=drs_url)
         return info
 
-    def upload_data_table(tsv):
-        billing_project = os.environ['GOOGLE_PROJECT']
-        workspace = os.environ['WORKSPACE_NAME']
-        resp = fiss.fapi.upload_entities(billing_project, workspace, tsv, model="flexible")
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def call_with_retries(fapi_method, *args, retries: int=5, **kwargs):
+        """
+        Call a Firecloud API method, retrying connection errors and transient error responses with exponential backoff.
+        Only idempotent calls should be retried.
+        """
+        import requests
+        assert retries >= 1
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                resp = fapi_method(*args, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt == retries - 1:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    break
         resp.raise_for_status()
+        return resp
+
+    def upload_data_table(tsv: str):
+        from firecloud import fiss
+        call_with_retries(fiss.fapi.upload_entities, google_project, workspace, tsv, model="flexible")
+
+    def upload_manifest_table(table: str, manifest: str, location: str, path_columns: List[str],
+                              sample_ids: Optional[Set[str]]=None, sample_column: str="sample",
+                              chunksize: int=10000) -> int:
+        """
+        Create a data table from a local CSV or TSV manifest containing a sample column and columns of file names.
+        File names in `path_columns` are replaced with their paths under `location`, e.g. "gs://bucket/my-crams". If
+        `sample_ids` is given, rows with any other sample id are skipped.
+
+        The manifest is memory-mapped and uploaded `chunksize` rows at a time, so memory use does not depend on the
+        size of the manifest. Return the number of rows uploaded.
+        """
+        import pandas as pd
+        sep = "," if manifest.endswith(".csv") else "\t"
+        # An index builds its hash table once, so each chunk is validated without rehashing all sample ids
+        sample_index = pd.Index(list(sample_ids)) if sample_ids is not None else None
+        number_of_rows = 0
+        skipped = 0
+        for chunk in pd.read_csv(manifest, sep=sep, dtype=str, keep_default_na=False, memory_map=True,
+                                 chunksize=chunksize):
+            if sample_index is not None:
+                known = sample_index.get_indexer(chunk[sample_column]) >= 0
+                skipped += len(chunk) - int(known.sum())
+                chunk = chunk[known]
+            if not len(chunk):
+                continue
+            chunk = chunk[sorted(chunk.columns)]
+            for column in path_columns:
+                # Empty file names are left empty, rather than becoming paths to `location` itself
+                chunk[column] = chunk[column].where(chunk[column] == "", f"{location}/" + chunk[column])
+            chunk.insert(0, f"{table}_id", range(number_of_rows, number_of_rows + len(chunk)))
+            upload_data_table(chunk.to_csv(sep="\t", index=False))
+            number_of_rows += len(chunk)
+        if skipped:
+            print(f"Skipped {skipped} manifest rows with unknown sample ids")
+        return number_of_rows
 
 get_drs_urls = mock.MagicMock()  # noqa
 
@@ -140,9 +202,35 @@ with herzog.Cell("python"):
                                             f"{bucket}/{pfx}/{crai['file_name']}"])
     upload_data_table(tsv_data)
 
+with herzog.Cell("markdown"):
+    """
+    If you have a local manifest of many samples, upload it to the notebook's disk and create the data table from it
+    instead. The manifest may be a CSV or TSV file with a header, and `sample`, `cram`, and `crai` columns containing
+    the sample ids and file names of the copied files. Samples that are not in the Gen3 tables are skipped:
+    ```
+    upload_manifest_table("IGV_viewer", "manifest.tsv", f"{bucket}/{pfx}", ["cram", "crai"],
+                          sample_ids=set(crams) & set(crais))
+    ```
+    The manifest is read and uploaded in chunks, so manifests with millions of samples can be used without running
+    out of memory.
+    """
+
 with herzog.Cell("markdown"):
     """
     When you are done viewing, delete the files you copied so you avoid paying long-term storage costs. If you delete
     the data table, this doesn't actually delete the files in your bucket. You will need to navigate to the "file"
     section of your workspace and individually delete the files in the "folders" labeled "cram" and "crai".
     """
+
+################################################ TESTS ################################################ noqa
+upload_data_table.reset_mock()
+with tempfile.NamedTemporaryFile("w", suffix=".csv") as fh:
+    fh.write("sample,cram,crai\n")
+    for s in samples + ["NWD000000"]:
+        fh.write(f"{s},{s}.cram,{s}.crai\n")
+    fh.flush()
+    assert 2 == upload_manifest_table("IGV_viewer", fh.name, f"{bucket}/{pfx}", ["cram", "crai"],
+                                      sample_ids=set(crams) & set(crais), chunksize=1)
+tsv_lines = [line for args, _ in upload_data_table.call_args_list for line in args[0].splitlines()[1:]]
+assert tsv_lines == ["\t".join([f"{i}", f"{bucket}/{pfx}/{s}.crai", f"{bucket}/{pfx}/{s}.cram", s])
+                     for i, s in enumerate(samples)]
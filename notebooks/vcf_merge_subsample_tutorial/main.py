@@ -1,6 +1,9 @@
 # publish to: "terra-notebook-utils-tests" "VCF Merge and Subsample Tutorial"
 import os
+import tempfile
 import herzog
+from uuid import uuid4
+from unittest import mock
 
 with herzog.Cell("markdown"):
     """
@@ -38,16 +41,39 @@ with herzog.Cell("python"):
     # Install the [terra-notebook-utils](https://github.com/DataBiosphere/terra-notebook-utils) package and import libraries
     #%pip install --upgrade --no-cache-dir terra-notebook-utils
     import os
-    from firecloud import fiss
-    import terra_notebook_utils as tnu
+    import time
+
+    google_project = os.environ['GOOGLE_PROJECT']
+    workspace = os.environ['WORKSPACE_NAME']
 
 with herzog.Cell("python"):
-    # Create a useful function to upload a tsv to a Terra Data Table
-    def upload_data_table(tsv):
-        billing_project = os.environ['GOOGLE_PROJECT']
-        workspace = os.environ['WORKSPACE_NAME']
-        resp = fiss.fapi.upload_entities(billing_project, workspace, tsv, model="flexible")
+    # Create useful functions to call the Firecloud API, and to upload a tsv to a Terra Data Table
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def call_with_retries(fapi_method, *args, retries: int=5, **kwargs):
+        """
+        Call a Firecloud API method, retrying connection errors and transient error responses with exponential backoff.
+        Only idempotent calls should be retried.
+        """
+        import requests
+        assert retries >= 1
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                resp = fapi_method(*args, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt == retries - 1:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    break
         resp.raise_for_status()
+        return resp
+
+    def upload_data_table(tsv: str):
+        from firecloud import fiss
+        call_with_retries(fiss.fapi.upload_entities, google_project, workspace, tsv, model="flexible")
 
 with herzog.Cell("python"):
     # List the VCFs to be merged
@@ -81,9 +107,147 @@ with herzog.Cell("python"):
     #!~/.local/bin/tnu vcf samples gs://fc-f4cc20e1-26ef-4eb9-9c55-aa8deb2d794b/merged/chr21.vcf.gz
     pass
 
+with herzog.Cell("markdown"):
+    """
+    ## Index sample membership across the merged VCFs
+
+    Reading VCF headers to find out which merged VCFs contain which samples is slow when there are many VCFs. The
+    functions below build a sample index once from the VCF headers. Sample IDs are interned to integers, and the
+    membership of each VCF is stored as a bitset, along with the column order of its samples. The index is saved to a
+    local JSON file, and refreshing it only reads the headers of VCFs that are not already indexed.
+
+    Once the index is built, preparing subsample inputs for any number of samples requires no further I/O.
+    """
+
 with herzog.Cell("python"):
-    # Prepare the subsample workflow input data table
-    # There should be one row per chromosome VCF
+    import json
+    from typing import Dict, Iterable, List
+
+    def read_vcf_samples(vcf_url: str) -> List[str]:
+        """
+        Return the sample IDs of a VCF stored in Google Storage, in column order.
+        """
+        from terra_notebook_utils import vcf
+        from terra_notebook_utils.blobstore.gs import GSBlob
+        bucket_name, key = vcf_url[len("gs://"):].split("/", 1)
+        blob = GSBlob(bucket_name, key)
+        if not blob.exists():
+            raise FileNotFoundError(f"No such VCF: {vcf_url}")
+        return vcf.VCFInfo.with_blob(blob).samples
+
+    def new_sample_index() -> dict:
+        return dict(samples=list(), sample_ids=dict(), vcfs=dict())
+
+    def add_vcf_to_index(index: dict, vcf_url: str, samples: List[str]):
+        columns = list()
+        for sample in samples:
+            if sample not in index['sample_ids']:
+                index['sample_ids'][sample] = len(index['samples'])
+                index['samples'].append(sample)
+            columns.append(index['sample_ids'][sample])
+        members = 0
+        for sample_id in columns:
+            members |= 1 << sample_id
+        index['vcfs'][vcf_url] = dict(columns=columns, members=members)
+
+    def refresh_sample_index(index: dict, vcf_urls: Iterable[str]) -> List[str]:
+        """
+        Read the headers of VCFs not yet in the index, and add them. Return the newly indexed VCF urls.
+        """
+        new_vcf_urls = [url for url in vcf_urls if url not in index['vcfs']]
+        for vcf_url in new_vcf_urls:
+            add_vcf_to_index(index, vcf_url, read_vcf_samples(vcf_url))
+        return new_vcf_urls
+
+    def save_sample_index(index: dict, path: str):
+        with open(path, "w") as fh:
+            json.dump(dict(samples=index['samples'],
+                           vcfs={url: info['columns'] for url, info in index['vcfs'].items()}), fh)
+
+    def load_sample_index(path: str) -> dict:
+        index = new_sample_index()
+        if os.path.exists(path):
+            with open(path) as fh:
+                data = json.load(fh)
+            index['samples'] = data['samples']
+            index['sample_ids'] = {sample: i for i, sample in enumerate(data['samples'])}
+            for vcf_url, columns in data['vcfs'].items():
+                members = 0
+                for sample_id in columns:
+                    members |= 1 << sample_id
+                index['vcfs'][vcf_url] = dict(columns=columns, members=members)
+        return index
+
+    def sample_columns(index: dict, vcf_url: str) -> Dict[str, int]:
+        """
+        Return the VCF column position of each sample in `vcf_url`. Sample columns start after the 9 fixed columns.
+        """
+        return {index['samples'][sample_id]: 9 + i for i, sample_id in enumerate(index['vcfs'][vcf_url]['columns'])}
+
+    def subsample_vcf_samples(index: dict, samples: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Return the requested samples present in each indexed VCF, in VCF column order. VCFs containing none of the
+        requested samples are omitted.
+        """
+        requested = 0
+        for sample in samples:
+            if sample in index['sample_ids']:
+                requested |= 1 << index['sample_ids'][sample]
+        vcf_samples = dict()
+        for vcf_url, info in index['vcfs'].items():
+            present = info['members'] & requested
+            if present:
+                vcf_samples[vcf_url] = [index['samples'][sample_id] for sample_id in info['columns']
+                                        if present >> sample_id & 1]
+        return vcf_samples
+
+with herzog.Cell("python"):
+    # List the merged VCFs to index
+    from terra_notebook_utils import gs
+    merged_vcfs = [f"{bucket}/{key}" for key in gs.list_bucket("merged") if key.endswith(".vcf.gz")]
+    # The index is saved next to this notebook
+    sample_index_path = "sample_index.json"
+
+test_vcf_samples = {f"{bucket}/merged/chr21.vcf.gz": ["NWD348918", "NWD357834", "NWD810020", "NWD894075", "NWD954598"],
+                    f"{bucket}/merged/chr22.vcf.gz": ["NWD954598", "NWD848492", "NWD312654", "NWD357834"]}
+merged_vcfs = list(test_vcf_samples.keys())
+unmocked_read_vcf_samples = read_vcf_samples
+read_vcf_samples = mock.MagicMock(side_effect=lambda vcf_url: test_vcf_samples[vcf_url])  # noqa
+test_dir = tempfile.TemporaryDirectory()
+sample_index_path = os.path.join(test_dir.name, "sample_index.json")
+
+with herzog.Cell("python"):
+    # Build the sample index, or refresh an existing one with newly merged VCFs
+    sample_index = load_sample_index(sample_index_path)
+    newly_indexed = refresh_sample_index(sample_index, merged_vcfs)
+    save_sample_index(sample_index, sample_index_path)
+    print(f"Indexed {len(newly_indexed)} new VCFs,",
+          f"{len(sample_index['samples'])} samples across {len(sample_index['vcfs'])} VCFs")
+
+with herzog.Cell("markdown"):
+    """
+    Prepare the subsample workflow input data table from the index. Each merged VCF is subsampled to all of the
+    selected samples it contains, so the same sample may be kept in several VCFs. To keep different samples in each
+    VCF, prepare the table by hand as shown below.
+    """
+
+with herzog.Cell("python"):
+    # Prepare the subsample workflow input data table from the index.
+    # There is one row per merged VCF containing any of the selected samples
+    selected_samples = ["NWD348918", "NWD357834", "NWD810020", "NWD894075", "NWD954598", "NWD848492", "NWD312654"]
+    tsv_data = "\t".join(["subsample_input_id", "input", "output", "samples"])
+    for i, (vcf_url, vcf_samples) in enumerate(subsample_vcf_samples(sample_index, selected_samples).items()):
+        tsv_data += os.linesep + "\t".join([f"{i + 1}",
+                                            vcf_url,
+                                            vcf_url.replace(f"{bucket}/merged/", f"{bucket}/subsampled/"),
+                                            ",".join(vcf_samples)])
+    upload_data_table(tsv_data)
+
+with herzog.Cell("markdown"):
+    """
+    The subsample workflow input data table can also be prepared by hand, choosing different samples for each VCF, with
+    one row per chromosome VCF:
+    ```
     tsv_data = "\t".join(["subsample_input_id", "input", "output", "samples"])
     tsv_data += os.linesep + "\t".join(["1",
                                         f"{bucket}/merged/chr21.vcf.gz",
@@ -94,3 +258,39 @@ with herzog.Cell("python"):
                                         f"{bucket}/subsampled/chr22.vcf.gz",
                                         "NWD954598,NWD848492,NWD312654"])
     upload_data_table(tsv_data)
+    ```
+    """
+
+################################################ TESTS ################################################ noqa
+index = new_sample_index()
+assert refresh_sample_index(index, merged_vcfs) == merged_vcfs
+assert refresh_sample_index(index, merged_vcfs) == list()
+assert len(index['samples']) == 7
+save_sample_index(index, sample_index_path)
+loaded_index = load_sample_index(sample_index_path)
+assert loaded_index == index
+assert sample_columns(index, merged_vcfs[1]) == dict(NWD954598=9, NWD848492=10, NWD312654=11, NWD357834=12)
+assert subsample_vcf_samples(index, ["NWD357834", "NWD954598", "NWD000000"]) == {
+    merged_vcfs[0]: ["NWD357834", "NWD954598"],
+    merged_vcfs[1]: ["NWD954598", "NWD357834"],
+}
+assert subsample_vcf_samples(index, ["NWD848492"]) == {merged_vcfs[1]: ["NWD848492"]}
+assert subsample_vcf_samples(index, ["NWD000000"]) == dict()
+test_dir.cleanup()
+try:
+    unmocked_read_vcf_samples(f"{bucket}/merged/{uuid4()}.vcf.gz")
+except FileNotFoundError:
+    pass
+else:
+    raise AssertionError("Expected FileNotFoundError for a missing VCF")
+
+# Read the samples of a real merged VCF, and compare them with its header line read directly
+import gzip
+from terra_notebook_utils import gs
+merged_vcf = "gs://fc-f4cc20e1-26ef-4eb9-9c55-aa8deb2d794b/merged/chr21.vcf.gz"
+bucket_name, key = merged_vcf[len("gs://"):].split("/", 1)
+with gzip.GzipFile(fileobj=gs.get_client().bucket(bucket_name).blob(key).open("rb")) as fh:
+    header = next(line for line in fh if line.startswith(b"#CHROM"))
+expected_samples = header.decode("utf-8").rstrip("\n").split("\t")[9:]
+assert expected_samples
+assert unmocked_read_vcf_samples(merged_vcf) == expected_samples
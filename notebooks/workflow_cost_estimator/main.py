@@ -37,15 +37,14 @@ with herzog.Cell("markdown"):
     """
 
 with herzog.Cell("python"):
-    import pandas as pd
-    from terra_notebook_utils import costs, workflows
-
     def list_submissions_chronological():
+        from terra_notebook_utils import workflows
         listing = [(s['submissionDate'], s) for s in workflows.list_submissions()]
         for date, submission in sorted(listing):
             yield submission
 
     def cost_for_submission(submission_id: str):
+        from terra_notebook_utils import workflows
         submission = workflows.get_submission(submission_id)
         for wf in submission['workflows']:
             for shard_info in workflows.estimate_workflow_cost(submission_id, wf['workflowId']):
@@ -53,6 +52,7 @@ with herzog.Cell("python"):
                 yield shard_info
 
     def estimate_job_cost(cpus: int, memory_gb: int, runtime_hours: float, preemptible: bool) -> float:
+        from terra_notebook_utils import costs
         return costs.GCPCustomN1Cost.estimate(cpus, memory_gb, runtime_hours * 3600, preemptible)
 
 with herzog.Cell("markdown"):
@@ -70,6 +70,7 @@ submission_id = submissions[-1]['submissionId']
 
 with herzog.Cell("python"):
     # submission_id = "b25c93e8-41ad-4980-b63c-46963b0402bc"  # Uncomment and insert your submission id here
+    import pandas as pd
     report = pd.DataFrame()
     for shard_info in cost_for_submission(submission_id):
         shard_info['duration'] /= 3600
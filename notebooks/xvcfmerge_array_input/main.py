@@ -40,26 +40,46 @@ os.environ['GOOGLE_PROJECT'] = "firecloud-cgl"
 
 with herzog.Cell("python"):
     import os
-    from firecloud import fiss
+    import time
+
+    google_project = os.environ['GOOGLE_PROJECT']
+    workspace = os.environ['WORKSPACE_NAME']
+
+    # Function to call the Firecloud API
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def call_with_retries(fapi_method, *args, retries: int=5, **kwargs):
+        """
+        Call a Firecloud API method, retrying connection errors and transient error responses with exponential backoff.
+        Only idempotent calls should be retried.
+        """
+        import requests
+        assert retries >= 1
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                resp = fapi_method(*args, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt == retries - 1:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    break
+        resp.raise_for_status()
+        return resp
 
     # Function to upload TSVs to a Terra Data Table
     def upload_data_table(tsv: str):
-        resp = fiss.fapi.upload_entities(os.environ['GOOGLE_PROJECT'],
-                                         os.environ['WORKSPACE_NAME'],
-                                         tsv,
-                                         model="flexible")
-        resp.raise_for_status()
+        from firecloud import fiss
+        call_with_retries(fiss.fapi.upload_entities, google_project, workspace, tsv, model="flexible")
 
     # Function to modify Terra Data Table rows
     def update_row(table: str, row_name: str, updates: dict):
+        from firecloud import fiss
         fiss_updates = [fiss.fapi._attr_set(column, value)
                         for column, value in updates.items()]
-        resp = fiss.fapi.update_entity(os.environ['GOOGLE_PROJECT'],
-                                       os.environ['WORKSPACE_NAME'],
-                                       table,
-                                       row_name,
-                                       fiss_updates)
-        resp.raise_for_status()
+        call_with_retries(fiss.fapi.update_entity, google_project, workspace, table, row_name, fiss_updates)
 
 with herzog.Cell("markdown"):
     """
@@ -115,6 +135,7 @@ with herzog.Cell("python"):
 
 
 ################################################ TESTS ################################################ noqa
+from firecloud import fiss
 resp = fiss.fapi.get_entities(os.environ['GOOGLE_PROJECT'], os.environ['WORKSPACE_NAME'], "vcf-merge-input-drs")
 resp.raise_for_status()
 rows = resp.json()
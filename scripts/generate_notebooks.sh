@@ -0,0 +1,80 @@
+#!/bin/bash
+
+set -euo pipefail
+
+function usage() {
+    echo 'Given one or more herzog source scripts, generate "notebook.ipynb" next to each'
+    echo 'script. A content hash of the script and the herzog version is recorded in'
+    echo '"notebook.ipynb.sha256", and notebooks whose hash is unchanged are skipped.'
+    echo 'Changed notebooks are generated in parallel, using $JOBS processes (default: all cores).'
+    echo 'With "--check", nothing is generated: the command fails if any notebook is missing or stale.'
+}
+
+if [[ $# -gt 0 && $1 == "--check" ]]; then
+    check="true"
+    shift
+else
+    check="false"
+fi
+
+if [[ $# == 0 ]]; then
+    usage
+    exit 1
+fi
+
+for herzog_script in "$@"; do
+    if [[ ! -f ${herzog_script} ]]; then
+        echo "${herzog_script}: No such file"
+        exit 1
+    fi
+done
+
+# importlib.metadata requires Python 3.8. Notebooks are developed with Python 3.7 to match Terra, where the
+# setuptools pkg_resources module is used instead.
+HERZOG_VERSION=$(python -c "
+try:
+    from importlib.metadata import version
+except ImportError:
+    from pkg_resources import get_distribution
+    def version(name): return get_distribution(name).version
+print(version('herzog'))")
+export HERZOG_VERSION check
+
+function source_hash() {
+    (echo "herzog ${HERZOG_VERSION}"; cat "$1") | sha256sum | cut -d' ' -f1
+}
+
+# Print the stamp for a notebook: the source hash followed by the hash of the generated .ipynb
+function current_stamp() {
+    local herzog_script=$1
+    local notebook_ipynb=$(dirname "${herzog_script}")/notebook.ipynb
+    echo "$(source_hash "${herzog_script}") $(sha256sum "${notebook_ipynb}" | cut -d' ' -f1)"
+}
+
+function generate_one() {
+    # xargs runs this in a child shell, which does not inherit the options set above
+    set -euo pipefail
+    local herzog_script=$1
+    local notebook_ipynb=$(dirname "${herzog_script}")/notebook.ipynb
+    local stamp=${notebook_ipynb}.sha256
+    if [[ -f ${notebook_ipynb} && -f ${stamp} && "$(cat "${stamp}")" == "$(current_stamp "${herzog_script}")" ]]; then
+        echo "${notebook_ipynb}: up to date"
+        return 0
+    elif [[ ${check} == "true" ]]; then
+        echo "${notebook_ipynb}: stale"
+        return 1
+    fi
+    if ! herzog "${herzog_script}" > "${notebook_ipynb}.tmp"; then
+        rm -f "${notebook_ipynb}.tmp"
+        echo "${notebook_ipynb}: generation failed"
+        return 1
+    fi
+    mv "${notebook_ipynb}.tmp" "${notebook_ipynb}"
+    current_stamp "${herzog_script}" > "${stamp}"
+    echo "${notebook_ipynb}: generated"
+}
+
+export -f source_hash current_stamp generate_one
+
+JOBS=${JOBS:-$(getconf _NPROCESSORS_ONLN)}
+printf '%s\0' "$@" | xargs -0 -n 1 -P "${JOBS}" bash -c 'generate_one "$1"' _
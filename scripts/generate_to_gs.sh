@@ -7,11 +7,6 @@ function usage() {
     echo 'and copy it into the GS url.'
 }
 
-if [[ ! $(command -v gsutil) ]]; then
-    echo "Please install gsutil by following instructions at 'https://cloud.google.com/storage/docs/gsutil_install'"
-    exit 1
-fi
-
 if [[ $# != 2 ]]; then
     usage
     exit 1
@@ -26,4 +21,4 @@ if [[ ! -f ${herzog_script} ]]; then
 fi
 
 herzog "${herzog_script}" > notebook.ipynb
-gsutil cp notebook.ipynb "${gs_dest}" || echo "Unable to publish to ${gs_dest}"
+python "$(dirname "$0")/publish.py" --dest "${gs_dest}" notebook.ipynb
@@ -0,0 +1,30 @@
+#!/bin/bash
+
+set -euo pipefail
+
+function usage() {
+    echo 'Given a Docker container name and a requirements file in this repository,'
+    echo 'pip install the requirements into the container. Installation is skipped if'
+    echo 'requirements with the same content hash were already installed in the container.'
+}
+
+if [[ $# != 2 ]]; then
+    usage
+    exit 1
+fi
+
+container=$1
+requirements=$2
+
+if [[ ! -f ${requirements} ]]; then
+    echo "${requirements}: No such file"
+    exit 1
+fi
+
+marker="${LEO_USER_HOME}/.bdcat_requirements/$(sha256sum "${requirements}" | cut -d' ' -f1)"
+if docker exec "${container}" test -f "${marker}"; then
+    echo "${requirements}: already installed in ${container}"
+else
+    docker exec "${container}" bash -c "${LEO_PIP} install --upgrade -r ${LEO_REPO_DIR}/${requirements}"
+    docker exec "${container}" bash -c "mkdir -p $(dirname ${marker}) && touch ${marker}"
+fi
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Publish generated notebooks to Google Storage destinations.
+
+Given pairs of notebook .ipynb files and publish directive files, copy each notebook to the destinations listed in its
+publish directive. Publish directive files contain lines specifying Google Storage destinations of the notebook, e.g.
+"gs://bucket_name/pfx/notebook_name.ipynb". The GS url may contain spaces. Text after "#" in any line is ignored.
+
+A notebook is uploaded only if it differs from the destination object. Objects are compared by MD5, or by CRC32C for
+composite objects, which have no MD5. Uploads run concurrently using a single storage client, authenticated with Google
+application default credentials. The exit status is non-zero if any destination could not be published. If the
+environment variable STORAGE_EMULATOR_HOST is set, the emulator at that address is used without authentication.
+"""
+import os
+import sys
+import base64
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import google_crc32c
+import requests
+from google.cloud import storage
+
+
+def read_publish_directive(path: str) -> List[str]:
+    destinations = list()
+    with open(path) as fh:
+        for line in fh:
+            gs_dest = " ".join(line.split("#", 1)[0].split())
+            if gs_dest:
+                destinations.append(gs_dest)
+    return destinations
+
+def local_hashes(path: str) -> Dict[str, str]:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    return dict(md5=base64.b64encode(hashlib.md5(data).digest()).decode("ascii"),
+                crc32c=base64.b64encode(google_crc32c.Checksum(data).digest()).decode("ascii"))
+
+def get_client(jobs: int) -> storage.Client:
+    if os.environ.get('STORAGE_EMULATOR_HOST'):
+        from google.auth.credentials import AnonymousCredentials
+        client = storage.Client(project="emulator", credentials=AnonymousCredentials())
+    else:
+        client = storage.Client()
+    # Allow one pooled connection per concurrent upload
+    adapter = requests.adapters.HTTPAdapter(pool_connections=jobs, pool_maxsize=jobs)
+    client._http.mount("https://", adapter)
+    client._http.mount("http://", adapter)
+    return client
+
+def is_unchanged(blob: storage.Blob, hashes: Dict[str, str]) -> bool:
+    if blob.md5_hash:
+        return blob.md5_hash == hashes['md5']
+    # Composite objects have no MD5
+    return blob.crc32c == hashes['crc32c']
+
+def publish_one(client: storage.Client, notebook_ipynb: str, hashes: Dict[str, str], gs_dest: str) -> Tuple[bool, str]:
+    try:
+        bucket_name, key = gs_dest[len("gs://"):].split("/", 1)
+        bucket = client.bucket(bucket_name)
+        blob = bucket.get_blob(key)
+        if blob is not None and is_unchanged(blob, hashes):
+            return True, f"{gs_dest}: unchanged"
+        bucket.blob(key).upload_from_filename(notebook_ipynb)
+        return True, f"{gs_dest}: published"
+    except Exception as e:
+        return False, f"Unable to publish to {gs_dest}: {e}"
+
+def publish(pairs: List[Tuple[str, List[str]]], jobs: int) -> bool:
+    """
+    Publish each notebook in `pairs` to its list of destinations. Return False if any destination failed.
+    """
+    client = get_client(jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = list()
+        for notebook_ipynb, destinations in pairs:
+            hashes = local_hashes(notebook_ipynb)
+            for gs_dest in destinations:
+                futures.append(executor.submit(publish_one, client, notebook_ipynb, hashes, gs_dest))
+        succeeded = True
+        for f in futures:
+            ok, message = f.result()
+            print(message)
+            succeeded &= ok
+    return succeeded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", metavar="notebook.ipynb publish.txt",
+                        help="Notebook and publish directive pairs. With --dest, a single notebook.")
+    parser.add_argument("--dest", default=None, help="Publish a single notebook to this GS url")
+    parser.add_argument("--jobs", type=int, default=16, help="Number of concurrent uploads")
+    args = parser.parse_args()
+    if args.dest:
+        if 1 != len(args.files):
+            parser.error("--dest requires exactly one notebook")
+        pairs = [(args.files[0], [args.dest])]
+    else:
+        if len(args.files) % 2:
+            parser.error("Notebooks and publish directives must be given in pairs")
+        pairs = [(notebook_ipynb, read_publish_directive(publish_directive))
+                 for notebook_ipynb, publish_directive in zip(args.files[::2], args.files[1::2])]
+    for path in args.files:
+        if not os.path.isfile(path):
+            print(f"{path}: No such file")
+            sys.exit(1)
+    if not publish(pairs, args.jobs):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
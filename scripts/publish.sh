@@ -8,6 +8,7 @@ function usage() {
     echo 'directive file should contain lines specifying Google Storage destination of'
     echo 'the notebook .ipynb file: gs://bucket_name/pfx/notebook_name.ipynb'
     echo 'The GS url may contain spaces. Text after "#" in any line is ignored.'
+    echo 'Destinations whose content already matches the notebook are skipped.'
 }
 
 if [[ $# != 2 ]]; then
@@ -29,9 +30,4 @@ if [[ ! -f ${publish_directive} ]]; then
 
 fi
 
-while read line; do
-    gs_dest=$(echo -n ${line} | cut -d'#' -f1)
-    if [[ ! -z "${gs_dest}" ]]; then
-        gsutil cp "${notebook_ipynb}" "${gs_dest}" || echo "Unable to publish to ${gs_dest}"
-    fi
-done < ${publish_directive}
+python "$(dirname "$0")/publish.py" "${notebook_ipynb}" "${publish_directive}"
@@ -1,7 +1,9 @@
 #!/bin/bash
 function usage() {
-    echo 'Given a Docker container name, kill and remove existing named'
-    echo 'container and launch a new one.'
+    echo 'Given a Docker container name, launch a new container with that name, or'
+    echo 'reuse the named container if it is already running the current image with this'
+    echo 'repository mounted.'
+    echo 'Set LEO_FRESH_CONTAINER=true to always kill and remove an existing container.'
 }
 if [[ $# != 1 ]]; then
     usage
@@ -11,9 +13,20 @@ fi
 set -euo pipefail
 
 CONTAINER_NAME=$1
+if [[ -z $(docker image ls -q ${LEO_IMAGE}) ]]; then
+    docker pull ${LEO_IMAGE} 1>&2
+fi
+if [[ ${LEO_FRESH_CONTAINER:-false} != "true" ]]; then
+    # Print the image and the host directory mounted at the repo location, if the container is running
+    running=$(docker inspect -f "{{if .State.Running}}{{.Config.Image}} {{range .Mounts}}{{if eq .Destination \"${LEO_REPO_DIR}\"}}{{.Source}}{{end}}{{end}}{{end}}" \
+              "${CONTAINER_NAME}" 2>/dev/null || :)
+    if [[ ${running} == "${LEO_IMAGE} ${BDCAT_NOTEBOOKS_HOME}" ]]; then
+        echo -n $(docker inspect -f '{{.Id}}' "${CONTAINER_NAME}")
+        exit 0
+    fi
+fi
 docker kill $1 1>&2 || :
 docker rm $1 1>&2 || :
-docker pull ${LEO_IMAGE} 1>&2
 wid=$(docker run \
   -v ${BDCAT_NOTEBOOKS_HOME}:${LEO_REPO_DIR} \
   -v ~/.config:/home/jupyter-user/.config \
@@ -0,0 +1,90 @@
+#!/bin/bash
+
+set -euo pipefail
+
+function usage() {
+    echo 'Given one or more notebook names, e.g. "byod", execute each notebook in a pool'
+    echo 'of warm Docker containers. Notebooks are distributed across $POOL_SIZE containers'
+    echo '(default: one per notebook), which run in parallel. Output, per-notebook timing, and'
+    echo 'per-cell profiles are written to the "test-results" directory. Cell time and memory'
+    echo 'budgets are passed to the profiler with $CELL_BUDGET_ARGS, and the cold-start import'
+    echo 'time budget is passed to the import time check with $IMPORT_BUDGET_ARGS.'
+}
+
+if [[ $# == 0 ]]; then
+    usage
+    exit 1
+fi
+
+cd ${BDCAT_NOTEBOOKS_HOME}
+results=test-results
+mkdir -p ${results}
+for nb in "$@"; do
+    rm -f ${results}/${nb}.timing
+done
+
+POOL_SIZE=${POOL_SIZE:-$#}
+if [[ ${POOL_SIZE} -gt $# ]]; then
+    POOL_SIZE=$#
+fi
+
+# Distribute notebooks round-robin into one queue per container
+queues=()
+i=0
+for nb in "$@"; do
+    queues[$((i % POOL_SIZE))]="${queues[$((i % POOL_SIZE))]:-} ${nb}"
+    i=$((i + 1))
+done
+
+function run_queue() {
+    local container=$1
+    shift
+    local start_error
+    if ! start_error=$(scripts/run_leo_container.sh "${container}" 2>&1 > /dev/null); then
+        for nb in "$@"; do
+            echo "Unable to start container ${container}: ${start_error}" > ${results}/${nb}.log
+        done
+        return 1
+    fi
+    for nb in "$@"; do
+        local start=$(date +%s)
+        local status="passed"
+        if ! (scripts/install_requirements.sh "${container}" notebooks/${nb}/requirements.txt \
+              && docker exec -w ${LEO_REPO_DIR} "${container}" ${LEO_PYTHON} -m testing.import_budget \
+                 ${IMPORT_BUDGET_ARGS:-} notebooks/${nb}/main.py \
+              && docker exec -w ${LEO_REPO_DIR} "${container}" ${LEO_PYTHON} -m testing.profile_cells \
+                 ${CELL_BUDGET_ARGS:-} notebooks/${nb}/main.py) \
+              > ${results}/${nb}.log 2>&1; then
+            status="failed"
+        fi
+        echo "${nb} $(( $(date +%s) - start )) ${status}" > ${results}/${nb}.timing
+    done
+}
+
+# Pool containers are named per checkout, so that separate checkouts do not share containers
+pool=bdcat-notebooks-pool-$(echo -n "${BDCAT_NOTEBOOKS_HOME}" | sha256sum | cut -c1-8)
+pids=()
+for ((slot = 0; slot < POOL_SIZE; slot++)); do
+    run_queue "${pool}-${slot}" ${queues[${slot}]} &
+    pids+=($!)
+done
+for pid in "${pids[@]}"; do
+    # A failed queue is reported in the summary below
+    wait ${pid} || :
+done
+
+failed=0
+printf "%-40s %10s  %s\n" "notebook" "seconds" "status"
+for nb in "$@"; do
+    if [[ -f ${results}/${nb}.timing ]]; then
+        read name seconds status < ${results}/${nb}.timing
+    else
+        read name seconds status <<< "${nb} - failed"
+    fi
+    printf "%-40s %10s  %s\n" "${name}" "${seconds}" "${status}"
+    if [[ ${status} != "passed" ]]; then
+        echo "See ${results}/${nb}.log"
+        failed=1
+    fi
+done
+exit ${failed}
@@ -0,0 +1,3 @@
+"""
+Tooling for running and measuring the notebooks outside of Terra.
+"""
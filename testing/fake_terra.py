@@ -0,0 +1,499 @@
+"""
+A local stand-in for the Firecloud, Google Storage, and DRS endpoints used by the notebooks.
+
+Serve a store from the command line:
+
+    python -m testing.fake_terra serve --port 8080 --store store.json --latency 0.05
+
+or execute a notebook against an in-process server:
+
+    python -m testing.fake_terra run --latency 0.05 --failure-rate 0.01 notebooks/byod/main.py
+
+Before a notebook is run, the store is seeded with any data the notebook reads but does not create, see
+`testing.seeds`.
+
+Latency, bandwidth, and failure injection apply to every request except the "/_fake" control endpoints.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import struct
+import hashlib
+import argparse
+import threading
+from email import message_from_bytes
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+def _crc32c_table() -> List[int]:
+    table = list()
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+_CRC32C_TABLE = _crc32c_table()
+
+def crc32c(data: bytes) -> int:
+    crc = 0xFFFFFFFF
+    for b in data:
+        crc = _CRC32C_TABLE[(crc ^ b) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+def object_hashes(data: bytes) -> Dict[str, str]:
+    """
+    Return base64 encoded MD5 and CRC32C hashes, in the form used by Google Storage object metadata.
+    """
+    return dict(md5Hash=base64.b64encode(hashlib.md5(data).digest()).decode("ascii"),
+                crc32c=base64.b64encode(struct.pack(">I", crc32c(data))).decode("ascii"))
+
+class Faults:
+    """
+    Latency, bandwidth, and failure injection settings.
+    `latency` is in seconds per request, `bandwidth` in bytes per second (0 for unlimited), and `failure_rate` is the
+    probability that a request fails with `failure_status`.
+    """
+    def __init__(self, latency: float=0.0, bandwidth: float=0.0, failure_rate: float=0.0, failure_status: int=503,
+                 seed: Optional[int]=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+
+    def should_fail(self) -> bool:
+        return self.failure_rate > 0 and self._random.random() < self.failure_rate
+
+    def delay(self, number_of_bytes: int):
+        seconds = self.latency
+        if self.bandwidth:
+            seconds += number_of_bytes / self.bandwidth
+        if seconds:
+            time.sleep(seconds)
+
+    def update(self, settings: Dict[str, Any]):
+        for key in ("latency", "bandwidth", "failure_rate", "failure_status"):
+            if key in settings:
+                setattr(self, key, type(getattr(self, key))(settings[key]))
+        if "seed" in settings:
+            self._random.seed(settings['seed'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(latency=self.latency, bandwidth=self.bandwidth, failure_rate=self.failure_rate,
+                    failure_status=self.failure_status)
+
+class FakeTerraStore:
+    """
+    In-memory backing store for the fake server. If `path` is provided, the store is loaded from a JSON file at that
+    location, and saved to it after every change unless `persist` is False.
+    """
+    def __init__(self, path: Optional[str]=None, persist: bool=True):
+        self.path = path
+        self.persist = persist
+        self.lock = threading.RLock()
+        self.entities = dict()  # type: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]
+        self.submissions = dict()  # type: Dict[str, Dict[str, Dict[str, Any]]]
+        self.workflow_metadata = dict()  # type: Dict[str, Dict[str, Any]]
+        self.objects = dict()  # type: Dict[str, Dict[str, bytes]]
+        self.drs_objects = dict()  # type: Dict[str, str]
+        if path and os.path.exists(path):
+            self.load()
+
+    # Keys are joined with "/" so the store can round trip through JSON.
+    @staticmethod
+    def workspace_key(namespace: str, workspace: str) -> str:
+        return f"{namespace}/{workspace}"
+
+    def load(self):
+        with open(self.path) as fh:
+            data = json.load(fh)
+        with self.lock:
+            self.entities = data.get('entities', dict())
+            self.submissions = data.get('submissions', dict())
+            self.workflow_metadata = data.get('workflow_metadata', dict())
+            self.objects = {bucket: {name: base64.b64decode(content) for name, content in objects.items()}
+                            for bucket, objects in data.get('objects', dict()).items()}
+            self.drs_objects = data.get('drs_objects', dict())
+
+    def save(self):
+        if not (self.path and self.persist):
+            return
+        with self.lock:
+            data = dict(entities=self.entities,
+                        submissions=self.submissions,
+                        workflow_metadata=self.workflow_metadata,
+                        objects={bucket: {name: base64.b64encode(content).decode("ascii")
+                                          for name, content in objects.items()}
+                                 for bucket, objects in self.objects.items()},
+                        drs_objects=self.drs_objects)
+            with open(f"{self.path}.tmp", "w") as fh:
+                json.dump(data, fh)
+            os.replace(f"{self.path}.tmp", self.path)
+
+    def table(self, namespace: str, workspace: str, etype: str) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            tables = self.entities.setdefault(self.workspace_key(namespace, workspace), dict())
+            return tables.setdefault(etype, dict())
+
+    def list_entities(self, namespace: str, workspace: str, etype: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [dict(name=name, entityType=etype, attributes=dict(attributes))
+                    for name, attributes in self.table(namespace, workspace, etype).items()]
+
+    def upload_tsv(self, namespace: str, workspace: str, tsv: str):
+        lines = [line for line in tsv.splitlines() if line.strip()]
+        header = lines[0].split("\t")
+        etype = header[0].split(":", 1)[-1]
+        if etype.endswith("_id"):
+            etype = etype[:-len("_id")]
+        with self.lock:
+            table = self.table(namespace, workspace, etype)
+            for line in lines[1:]:
+                name, *values = line.split("\t")
+                table.setdefault(name, dict()).update(zip(header[1:], values))
+        self.save()
+
+    def update_entity(self, namespace: str, workspace: str, etype: str, name: str, operations: List[Dict[str, Any]]):
+        with self.lock:
+            attributes = self.table(namespace, workspace, etype).setdefault(name, dict())
+            for op in operations:
+                if "AddUpdateAttribute" == op['op']:
+                    attributes[op['attributeName']] = op['addUpdateAttribute']
+                elif "RemoveAttribute" == op['op']:
+                    attributes.pop(op['attributeName'], None)
+        self.save()
+
+    def delete_entities(self, namespace: str, workspace: str, entities: List[Dict[str, str]]):
+        with self.lock:
+            for e in entities:
+                self.table(namespace, workspace, e['entityType']).pop(e['entityName'], None)
+        self.save()
+
+    def add_submission(self, namespace: str, workspace: str, submission: Dict[str, Any],
+                       workflow_metadata: Optional[Dict[str, Dict[str, Any]]]=None) -> str:
+        """
+        Add a submission, and optionally the metadata of its workflows keyed by workflow id.
+        """
+        submission = dict(submission)
+        submission.setdefault('submissionId', f"{uuid.uuid4()}")
+        with self.lock:
+            key = self.workspace_key(namespace, workspace)
+            self.submissions.setdefault(key, dict())[submission['submissionId']] = submission
+            for workflow_id, metadata in (workflow_metadata or dict()).items():
+                self.workflow_metadata[f"{key}/{submission['submissionId']}/{workflow_id}"] = metadata
+        self.save()
+        return submission['submissionId']
+
+    def put_object(self, bucket: str, name: str, content: bytes):
+        with self.lock:
+            self.objects.setdefault(bucket, dict())[name] = content
+        self.save()
+
+    def object_metadata(self, bucket: str, name: str) -> Dict[str, Any]:
+        content = self.objects[bucket][name]
+        return dict(kind="storage#object",
+                    id=f"{bucket}/{name}",
+                    name=name,
+                    bucket=bucket,
+                    size=f"{len(content)}",
+                    **object_hashes(content))
+
+    def add_drs_object(self, drs_uri: str, gs_url: str):
+        with self.lock:
+            self.drs_objects[drs_uri] = gs_url
+        self.save()
+
+class FakeTerraHandler(BaseHTTPRequestHandler):
+    server_version = "FakeTerra/0.1"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def store(self) -> FakeTerraStore:
+        return self.server.store  # type: ignore
+
+    @property
+    def faults(self) -> Faults:
+        return self.server.faults  # type: ignore
+
+    def log_message(self, *args):
+        if self.server.verbose:  # type: ignore
+            super().log_message(*args)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        path = [unquote(p) for p in url.path.strip("/").split("/")]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b""
+        if "_fake" == path[0]:
+            status, payload = self._control(method, path[1:], body)
+        else:
+            if self.faults.should_fail():
+                status, payload = self.faults.failure_status, dict(message="injected failure")
+            else:
+                try:
+                    status, payload = self._route(method, path, query, body)
+                except KeyError as e:
+                    status, payload = HTTPStatus.NOT_FOUND, dict(message=f"Not found: {e}")
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, dict(message=f"{type(e).__name__}: {e}")
+        if HTTPStatus.NO_CONTENT == status:
+            content, content_type = b"", "application/json"
+        elif isinstance(payload, bytes):
+            content, content_type = payload, "application/octet-stream"
+        else:
+            content, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        if "_fake" != path[0]:
+            self.faults.delay(len(body) + len(content))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", f"{len(content)}")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _control(self, method: str, path: List[str], body: bytes) -> Tuple[int, Any]:
+        if ["config"] == path:
+            if "GET" != method:
+                self.faults.update(json.loads(body))
+            return HTTPStatus.OK, self.faults.to_dict()
+        return HTTPStatus.NOT_FOUND, dict(message="Unknown control endpoint")
+
+    def _route(self, method: str, path: List[str], query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        if path[:2] == ["api", "workspaces"] and len(path) >= 5:
+            return self._workspace(method, path[2], path[3], path[4:], query, body)
+        elif path[:3] == ["storage", "v1", "b"]:
+            return self._storage(method, path[3:], query)
+        elif path[:4] == ["download", "storage", "v1", "b"]:
+            return self._storage(method, path[4:], query)
+        elif path[:4] == ["upload", "storage", "v1", "b"]:
+            return self._upload(path[4], query, body)
+        elif path[:4] == ["ga4gh", "drs", "v1", "objects"]:
+            return self._drs_object(path[4])
+        elif path == ["martha_v3"]:
+            return self._martha(json.loads(body)['url'])
+        return HTTPStatus.NOT_FOUND, dict(message="Unknown endpoint")
+
+    def _workspace(self, method: str, namespace: str, workspace: str, path: List[str], query: Dict[str, str],
+                   body: bytes) -> Tuple[int, Any]:
+        if "GET" == method and "entities" == path[0] and 2 == len(path):
+            return HTTPStatus.OK, self.store.list_entities(namespace, workspace, path[1])
+        elif "GET" == method and "entityQuery" == path[0]:
+            entities = sorted(self.store.list_entities(namespace, workspace, path[1]), key=lambda e: e['name'])
+            if "desc" == query.get('sortDirection'):
+                entities.reverse()
+            page, page_size = int(query.get('page', 1)), int(query.get('pageSize', 100))
+            return HTTPStatus.OK, dict(parameters=dict(page=page, pageSize=page_size),
+                                       resultMetadata=dict(unfilteredCount=len(entities),
+                                                           filteredCount=len(entities),
+                                                           filteredPageCount=-(-len(entities) // page_size)),
+                                       results=entities[(page - 1) * page_size:page * page_size])
+        elif "POST" == method and path[0] in ("importEntities", "flexibleImportEntities"):
+            tsv = parse_qs(body.decode("utf-8"))['entities'][0]
+            self.store.upload_tsv(namespace, workspace, tsv)
+            return HTTPStatus.OK, dict()
+        elif "POST" == method and ["entities", "delete"] == path:
+            self.store.delete_entities(namespace, workspace, json.loads(body))
+            return HTTPStatus.NO_CONTENT, dict()
+        elif "PATCH" == method and "entities" == path[0] and 3 == len(path):
+            self.store.update_entity(namespace, workspace, path[1], path[2], json.loads(body))
+            return HTTPStatus.OK, dict()
+        elif "GET" == method and "submissions" == path[0]:
+            submissions = self.store.submissions.get(self.store.workspace_key(namespace, workspace), dict())
+            if 1 == len(path):
+                return HTTPStatus.OK, [{k: v for k, v in s.items() if "workflows" != k} for s in submissions.values()]
+            elif 2 == len(path):
+                return HTTPStatus.OK, submissions[path[1]]
+            elif 4 == len(path) and "workflows" == path[2]:
+                key = f"{self.store.workspace_key(namespace, workspace)}/{path[1]}/{path[3]}"
+                return HTTPStatus.OK, self.store.workflow_metadata[key]
+        return HTTPStatus.NOT_FOUND, dict(message="Unknown workspace endpoint")
+
+    def _storage(self, method: str, path: List[str], query: Dict[str, str]) -> Tuple[int, Any]:
+        bucket = path[0]
+        if "GET" == method and ["o"] == path[1:]:
+            prefix = query.get('prefix', "")
+            names = sorted(name for name in self.store.objects.get(bucket, dict()) if name.startswith(prefix))
+            start = int(query.get('pageToken', 0))
+            stop = start + int(query.get('maxResults', 1000))
+            listing = dict(kind="storage#objects",
+                           items=[self.store.object_metadata(bucket, name) for name in names[start:stop]])
+            if stop < len(names):
+                listing['nextPageToken'] = f"{stop}"
+            return HTTPStatus.OK, listing
+        elif "GET" == method and 3 == len(path) and "o" == path[1]:
+            if "media" == query.get('alt'):
+                content = self.store.objects[bucket][path[2]]
+                byte_range = self.headers.get('Range')
+                if byte_range:
+                    first, last = byte_range[len("bytes="):].split("-")
+                    if not first:
+                        # Suffix range: the last `last` bytes
+                        return HTTPStatus.PARTIAL_CONTENT, content[len(content) - int(last):]
+                    if int(first) >= len(content):
+                        return HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, dict(message=f"Invalid range: {byte_range}")
+                    return HTTPStatus.PARTIAL_CONTENT, content[int(first):int(last) + 1 if last else None]
+                return HTTPStatus.OK, content
+            return HTTPStatus.OK, self.store.object_metadata(bucket, path[2])
+        return HTTPStatus.NOT_FOUND, dict(message="Unknown storage endpoint")
+
+    def _upload(self, bucket: str, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        if "multipart" == query.get('uploadType'):
+            message = message_from_bytes(b"Content-Type: " + self.headers['Content-Type'].encode("utf-8")
+                                         + b"\r\n\r\n" + body)
+            parts = message.get_payload()  # type: Any
+            name = json.loads(parts[0].get_payload())['name']
+            content = parts[1].get_payload(decode=True)
+        else:
+            name, content = query['name'], body
+        self.store.put_object(bucket, name, content)
+        return HTTPStatus.OK, self.store.object_metadata(bucket, name)
+
+    def _resolve_drs(self, drs_uri: str) -> Tuple[str, str, bytes]:
+        bucket, key = self.store.drs_objects[drs_uri][len("gs://"):].split("/", 1)
+        return bucket, key, self.store.objects[bucket][key]
+
+    def _drs_object(self, object_id: str) -> Tuple[int, Any]:
+        drs_uri = next((uri for uri in self.store.drs_objects if uri.rsplit("/", 1)[-1] == object_id), None)
+        if drs_uri is None:
+            return HTTPStatus.NOT_FOUND, dict(message=f"Unknown DRS object: {object_id}")
+        bucket, key, content = self._resolve_drs(drs_uri)
+        hashes = object_hashes(content)
+        return HTTPStatus.OK, dict(id=object_id,
+                                   self_uri=drs_uri,
+                                   size=len(content),
+                                   name=key.rsplit("/", 1)[-1],
+                                   checksums=[dict(type="md5", checksum=hashlib.md5(content).hexdigest()),
+                                              dict(type="crc32c", checksum=hashes['crc32c'])],
+                                   access_methods=[dict(type="gs", access_url=dict(url=f"gs://{bucket}/{key}"))])
+
+    def _martha(self, drs_uri: str) -> Tuple[int, Any]:
+        bucket, key, content = self._resolve_drs(drs_uri)
+        return HTTPStatus.OK, dict(gsUri=f"gs://{bucket}/{key}",
+                                   bucket=bucket,
+                                   name=key,
+                                   fileName=key.rsplit("/", 1)[-1],
+                                   size=len(content),
+                                   hashes=dict(md5=hashlib.md5(content).hexdigest()),
+                                   googleServiceAccount=None)
+
+class FakeTerraServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], store: Optional[FakeTerraStore]=None, faults: Optional[Faults]=None,
+                 verbose: bool=False):
+        super().__init__(address, FakeTerraHandler)
+        self.store = store or FakeTerraStore()
+        self.faults = faults or Faults()
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]!s}:{self.server_port}"
+
+    def start(self) -> "FakeTerraServer":
+        """
+        Serve from a daemon thread, and return the server.
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def configure_clients(url: str):
+    """
+    Point the Firecloud, Google Storage, and DRS clients used by the notebooks at the fake server at `url`.
+    Requests to the fake server are not authenticated.
+    """
+    import requests
+    os.environ['STORAGE_EMULATOR_HOST'] = url
+    os.environ['MARTHA_URL'] = f"{url}/martha_v3"
+    from firecloud import api as fapi
+    fapi.fcconfig.root_url = f"{url}/api/"
+    setattr(fapi, "__SESSION", requests.Session())
+    try:
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud.storage import Client
+        import terra_notebook_utils
+        from terra_notebook_utils import gs
+    except ImportError:
+        pass
+    else:
+        terra_notebook_utils.MARTHA_URL = os.environ['MARTHA_URL']
+        gs.get_client = lambda *args, **kwargs: Client(project="fake-terra", credentials=AnonymousCredentials())
+
+def run_notebook(path: str, server: FakeTerraServer):
+    """
+    Execute a notebook source script as `__main__`, with clients pointed at `server`.
+    """
+    import runpy
+    configure_clients(server.url)
+    sys.argv = [path]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    runpy.run_path(path, run_name="__main__")
+
+def _add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency added to each request")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Bytes per second, 0 for unlimited")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--failure-status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for failure injection")
+    parser.add_argument("--store", default=None, help="JSON file used to load and save the backing store")
+    parser.add_argument("--load", default=None, help="JSON file used to load the backing store, without saving changes")
+
+def main(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command")
+    serve_parser = commands.add_parser("serve", help="Serve until interrupted")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--verbose", action="store_true")
+    _add_fault_arguments(serve_parser)
+    run_parser = commands.add_parser("run", help="Execute a notebook source script against an in-process server")
+    run_parser.add_argument("notebook")
+    _add_fault_arguments(run_parser)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+    faults = Faults(args.latency, args.bandwidth, args.failure_rate, args.failure_status, args.seed)
+    if args.load:
+        store = FakeTerraStore(args.load, persist=False)
+    else:
+        store = FakeTerraStore(args.store)
+    if "serve" == args.command:
+        server = FakeTerraServer((args.host, args.port), store, faults, verbose=args.verbose)
+        print(f"Serving fake Terra at {server.url}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        from testing.seeds import seed_store
+        seed_store(store, args.notebook)
+        server = FakeTerraServer(("127.0.0.1", 0), store, faults).start()
+        try:
+            run_notebook(args.notebook, server)
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure the cold-start import cost of a notebook, and fail if it exceeds a budget:
+
+    python -m testing.import_budget --max-seconds 5 notebooks/byod/main.py
+
+The cost is the time taken by the import statements at the top level of the notebook's python cells, which run when
+the cells are executed in order. Imports inside functions are deferred until the functions are called, and are not
+counted. Imports are timed in a fresh interpreter with `-X importtime`.
+"""
+import ast
+import sys
+import argparse
+import subprocess
+from typing import List, Tuple
+
+from testing.notebook import python_cells
+
+
+def _alias(alias: ast.alias) -> str:
+    return f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+
+def cell_imports(path: str) -> List[str]:
+    """
+    Return the import statements at the top level of the python cells of a notebook source script.
+    """
+    statements = list()
+    for cell in python_cells(path):
+        for node in cell.body:
+            if isinstance(node, ast.Import):
+                statements.append("import " + ", ".join(_alias(a) for a in node.names))
+            elif isinstance(node, ast.ImportFrom):
+                module = "." * node.level + (node.module or "")
+                statements.append(f"from {module} import " + ", ".join(_alias(a) for a in node.names))
+    return statements
+
+def time_imports(statements: List[str]) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    Execute `statements` in a fresh interpreter. Return the total import time in seconds, and the cumulative import
+    time of each top level module, in descending order. Modules imported during interpreter startup are not counted.
+    """
+    _, startup = _run_with_importtime(["pass"])
+    startup_packages = {package for _, package in startup}
+    total, top_level = _run_with_importtime(statements)
+    total -= sum(seconds for seconds, package in top_level if package in startup_packages)
+    return total, [(seconds, package) for seconds, package in top_level if package not in startup_packages]
+
+def _run_with_importtime(statements: List[str]) -> Tuple[float, List[Tuple[float, str]]]:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode:
+        raise RuntimeError(f"Notebook imports failed:\n{proc.stderr}")
+    total_us = 0
+    top_level = list()
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, package = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        if not package.startswith("  "):
+            top_level.append((int(cumulative_us) / 1e6, package.strip()))
+    return total_us / 1e6, sorted(top_level, reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("notebook", help="Notebook source script, e.g. notebooks/byod/main.py")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Import time budget")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest top level imports to print")
+    args = parser.parse_args()
+    total, top_level = time_imports(cell_imports(args.notebook))
+    print(f"{args.notebook}: {total:.3f}s cold-start import time")
+    for seconds, package in top_level[:args.top]:
+        print(f"{seconds:10.3f}s  {package}")
+    if args.max_seconds is not None and total > args.max_seconds:
+        print(f"Import time {total:.3f}s exceeds budget of {args.max_seconds}s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
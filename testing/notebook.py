@@ -0,0 +1,56 @@
+"""
+Load code from herzog notebook source scripts without executing the notebook.
+"""
+import ast
+from typing import Any, Dict, List
+
+
+def _is_python_cell(node: ast.With) -> bool:
+    if 1 == len(node.items):
+        expr = node.items[0].context_expr
+        if (isinstance(expr, ast.Call)
+                and isinstance(expr.func, ast.Attribute) and "Cell" == expr.func.attr
+                and isinstance(expr.func.value, ast.Name) and "herzog" == expr.func.value.id
+                and expr.args):
+            # String literals are `ast.Str` before Python 3.8
+            return "python" == getattr(expr.args[0], "value", getattr(expr.args[0], "s", None))
+    return False
+
+def _is_constant_assignment(node: ast.stmt) -> bool:
+    return (isinstance(node, ast.Assign)
+            and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets))
+
+def python_cells(path: str) -> List[ast.With]:
+    """
+    Return the top level `with herzog.Cell("python")` blocks of a notebook source script.
+    """
+    with open(path) as fh:
+        tree = ast.parse(fh.read(), filename=path)
+    return [node for node in tree.body if isinstance(node, ast.With) and _is_python_cell(node)]
+
+def load_definitions(path: str, namespace: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute the imports, constants, function definitions, and class definitions found in the python cells of a notebook
+    source script into `namespace`, and return it. Other statements are skipped, so globals the definitions depend on,
+    such as the workspace name, should be provided in `namespace`.
+    """
+    definitions = [node for cell in python_cells(path) for node in cell.body
+                   if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef))
+                   or _is_constant_assignment(node)]  # type: List[ast.stmt]
+    module = ast.Module(body=definitions, type_ignores=[])
+    exec(compile(module, path, "exec"), namespace)
+    return namespace
+
+def cell_code(path: str, contains: str):
+    """
+    Return the compiled code of the first python cell of a notebook source script whose source contains `contains`.
+    """
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+        fh.seek(0)
+        tree = ast.parse(fh.read(), filename=path)
+    starts = [node.lineno for node in tree.body] + [len(lines) + 1]
+    for i, node in enumerate(tree.body):
+        if isinstance(node, ast.With) and _is_python_cell(node) and contains in "\n".join(lines[starts[i] - 1:starts[i + 1] - 1]):
+            return compile(ast.Module(body=node.body, type_ignores=[]), path, "exec")
+    raise ValueError(f"No python cell in {path} contains '{contains}'")
@@ -0,0 +1,177 @@
+"""
+Execute a notebook source script, recording wall time, CPU time, peak RSS increase, and the number of outbound HTTP
+requests of each herzog cell:
+
+    python -m testing.profile_cells --max-cell-seconds 300 --max-cell-memory-mb 2048 notebooks/byod/main.py
+
+A JSON report and a human readable table are written next to `--output`. The run fails if the notebook raises, or if
+any cell exceeds a time or memory budget. With `--offline`, the notebook runs against an in-process fake Terra server.
+"""
+import os
+import sys
+import json
+import time
+import runpy
+import argparse
+import linecache
+import resource
+import traceback
+from typing import Any, Dict, List, Optional
+
+import herzog
+
+
+# ru_maxrss is reported in kilobytes on Linux, and in bytes on macOS
+_RSS_UNIT = 1 if "darwin" == sys.platform else 1024
+
+def _max_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+class CellProfiler:
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.cells = list()  # type: List[Dict[str, Any]]
+        self.active = None  # type: Optional[Dict[str, Any]]
+        self.requests_outside_cells = 0
+
+    def first_line(self, lineno: Optional[int]) -> str:
+        """
+        Return the first line of cell content following the `with herzog.Cell` statement at `lineno`.
+        """
+        if lineno:
+            for i in range(lineno + 1, lineno + 4):
+                line = linecache.getline(self.path, i).strip()
+                if line and '"""' != line:
+                    return line
+        return ""
+
+    def count_request(self):
+        if self.active is not None:
+            self.active['requests'] += 1
+        else:
+            self.requests_outside_cells += 1
+
+    def cell_class(self):
+        profiler = self
+
+        class ProfiledCell(herzog.Cell):
+            def __init__(self, cell_type):
+                super().__init__(cell_type)
+                frame = sys._getframe(1)
+                self._lineno = frame.f_lineno if os.path.abspath(frame.f_code.co_filename) == profiler.path else None
+
+            def __enter__(self):
+                cell = super().__enter__()
+                lineno = self._lineno
+                profiler.active = dict(index=len(profiler.cells),
+                                       cell_type=self.cell_type.name,
+                                       line=lineno,
+                                       source=profiler.first_line(lineno),
+                                       requests=0)
+                self._start = (time.perf_counter(), time.process_time(), _max_rss())
+                return cell
+
+            def __exit__(self, *args, **kwargs):
+                wall, cpu, rss = self._start
+                profiler.active.update(wall_seconds=time.perf_counter() - wall,
+                                       cpu_seconds=time.process_time() - cpu,
+                                       peak_rss_delta_bytes=_max_rss() - rss)
+                profiler.cells.append(profiler.active)
+                profiler.active = None
+                return super().__exit__(*args, **kwargs)
+
+        return ProfiledCell
+
+    def install(self):
+        herzog.Cell = self.cell_class()
+        try:
+            import requests
+        except ImportError:
+            return
+        send = requests.Session.send
+
+        def counting_send(session, request, **kwargs):
+            self.count_request()
+            return send(session, request, **kwargs)
+
+        requests.Session.send = counting_send  # type: ignore
+
+def budget_violations(cells: List[Dict[str, Any]], max_seconds: Optional[float],
+                      max_memory_mb: Optional[float]) -> List[str]:
+    violations = list()
+    for cell in cells:
+        if max_seconds is not None and cell['wall_seconds'] > max_seconds:
+            violations.append(f"cell {cell['index']} (line {cell['line']}) took {cell['wall_seconds']:.3f}s, "
+                              f"budget is {max_seconds}s")
+        if max_memory_mb is not None and cell['peak_rss_delta_bytes'] > max_memory_mb * 2 ** 20:
+            violations.append(f"cell {cell['index']} (line {cell['line']}) increased peak RSS by "
+                              f"{cell['peak_rss_delta_bytes'] / 2 ** 20:.1f}MiB, budget is {max_memory_mb}MiB")
+    return violations
+
+def format_table(report: Dict[str, Any]) -> str:
+    lines = [f"{report['notebook']}: {report['wall_seconds']:.2f}s total, "
+             f"{report['requests_outside_cells']} requests outside cells",
+             f"{'cell':>4} {'line':>5} {'type':<8} {'wall':>9} {'cpu':>9} {'rss':>10} {'requests':>8}  source"]
+    for cell in report['cells']:
+        lines.append(f"{cell['index']:>4} {cell['line'] or '':>5} {cell['cell_type']:<8} "
+                     f"{cell['wall_seconds']:>8.3f}s {cell['cpu_seconds']:>8.3f}s "
+                     f"{cell['peak_rss_delta_bytes'] / 2 ** 20:>7.1f}MiB {cell['requests']:>8}  {cell['source'][:60]}")
+    if report['error']:
+        lines.append(f"error: {report['error']}")
+    for violation in report['budget_violations']:
+        lines.append(f"over budget: {violation}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("notebook", help="Notebook source script, e.g. notebooks/byod/main.py")
+    parser.add_argument("--output", default=None,
+                        help="JSON report path, default: test-results/{notebook}.profile.json")
+    parser.add_argument("--max-cell-seconds", type=float, default=None, help="Wall time budget for each cell")
+    parser.add_argument("--max-cell-memory-mb", type=float, default=None, help="Peak RSS increase budget for each cell")
+    parser.add_argument("--offline", action="store_true", help="Run against an in-process fake Terra server")
+    args = parser.parse_args()
+
+    name = os.path.basename(os.path.dirname(os.path.abspath(args.notebook)))
+    output = args.output or os.path.join("test-results", f"{name}.profile.json")
+    profiler = CellProfiler(args.notebook)
+    profiler.install()
+    server = None
+    if args.offline:
+        from testing.fake_terra import FakeTerraServer, FakeTerraStore, configure_clients
+        from testing.seeds import seed_store
+        store = FakeTerraStore()
+        seed_store(store, args.notebook)
+        server = FakeTerraServer(("127.0.0.1", 0), store).start()
+        configure_clients(server.url)
+    sys.argv = [args.notebook]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.notebook)))
+    error = None
+    start = time.perf_counter()
+    try:
+        runpy.run_path(args.notebook, run_name="__main__")
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        if server is not None:
+            server.shutdown()
+    report = dict(notebook=name,
+                  wall_seconds=time.perf_counter() - start,
+                  requests_outside_cells=profiler.requests_outside_cells,
+                  error=error and error.strip().splitlines()[-1],
+                  budget_violations=budget_violations(profiler.cells, args.max_cell_seconds, args.max_cell_memory_mb),
+                  cells=profiler.cells)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    table = format_table(report)
+    with open(f"{os.path.splitext(output)[0]}.txt", "w") as fh:
+        fh.write(table + "\n")
+    print(table)
+    if error:
+        print(error, file=sys.stderr)
+    if error or report['budget_violations']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Data that notebooks read but do not create themselves, for running them offline against the fake Terra server.
+
+    seed_store(store, "notebooks/workflow_cost_estimator/main.py")
+
+adds the data needed by a notebook to a store. Notebooks without a seed function are left unchanged.
+"""
+import io
+import os
+from typing import Callable, Dict, List
+
+from benchmarks.data import workflow_shard_metadata
+from testing.fake_terra import FakeTerraStore
+
+
+# The workspace the notebooks' mocked environments point at
+GOOGLE_PROJECT = "firecloud-cgl"
+WORKSPACE = "terra-notebook-utils-tests"
+
+def seed_workflow_cost_estimator(store: FakeTerraStore):
+    submission, workflow_metadata = workflow_shard_metadata(10, shards_per_workflow=5)
+    store.add_submission(GOOGLE_PROJECT, WORKSPACE, submission, workflow_metadata)
+
+def vcf_gz(samples: List[str]) -> bytes:
+    """
+    Return a block gzipped VCF with one variant and a genotype column for each sample.
+    """
+    import bgzip
+    lines = ["##fileformat=VCFv4.2",
+             "\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", *samples]),
+             "\t".join(["chr21", "5030578", ".", "C", "T", ".", "PASS", ".", "GT", *["0/1" for _ in samples]])]
+    buf = io.BytesIO()
+    with bgzip.BGZipWriter(buf) as writer:
+        writer.write(("\n".join(lines) + "\n").encode("utf-8"))
+    return buf.getvalue()
+
+def seed_vcf_merge_subsample_tutorial(store: FakeTerraStore):
+    # The tutorial's published merged VCF
+    store.put_object("fc-f4cc20e1-26ef-4eb9-9c55-aa8deb2d794b", "merged/chr21.vcf.gz",
+                     vcf_gz(["NWD348918", "NWD357834", "NWD810020", "NWD894075", "NWD954598"]))
+
+seeds = dict(vcf_merge_subsample_tutorial=seed_vcf_merge_subsample_tutorial,
+             workflow_cost_estimator=seed_workflow_cost_estimator)  # type: Dict[str, Callable[[FakeTerraStore], None]]
+
+def seed_store(store: FakeTerraStore, notebook: str):
+    # terra_notebook_utils reads the workspace from the environment when it is imported, which happens before the
+    # notebook's mocked environment is set. Terra also sets the namespace, which the mocked environments do not.
+    os.environ.setdefault('GOOGLE_PROJECT', GOOGLE_PROJECT)
+    os.environ.setdefault('WORKSPACE_NAMESPACE', GOOGLE_PROJECT)
+    os.environ.setdefault('WORKSPACE_NAME', WORKSPACE)
+    name = os.path.basename(os.path.dirname(os.path.abspath(notebook)))
+    if name in seeds:
+        seeds[name](store)